@@ -3,9 +3,16 @@ import requests
 import json
 import os
 
-API_BASE_URL = "https://www.moltbook.com/api/v1"
-CONFIG_DIR = os.path.expanduser("~/.config/moltbook")
-CREDENTIALS_FILE = os.path.join(CONFIG_DIR, "credentials.json")
+from moltbook_client import (
+    API_RATE_LIMIT,
+    CONFIG_DIR,
+    CREDENTIALS_FILE,
+    HEARTBEAT_STATE_FILE,
+    MoltbookClient,
+    MoltbookError,
+    describe_error,
+)
+from moltbook_profiler import CommandProfiler
 
 def save_credentials(api_key, agent_name):
     """Saves API key and agent name to the credentials file."""
@@ -14,39 +21,37 @@ def save_credentials(api_key, agent_name):
         json.dump({"api_key": api_key, "agent_name": agent_name}, f, indent=2)
     click.echo(f"Credentials saved to {CREDENTIALS_FILE}")
 
-def load_credentials():
-    """Loads credentials from the credentials file."""
+def get_client():
+    """Builds an API client, or reports a missing API key and returns None."""
     try:
-        with open(CREDENTIALS_FILE, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return None
-    except json.JSONDecodeError:
+        return MoltbookClient(background_refresh=False)
+    except MoltbookError as e:
+        click.echo(str(e), err=True)
         return None
 
-def get_api_key():
-    """Gets the API key from credentials file or environment variable."""
-    creds = load_credentials()
-    if creds and "api_key" in creds:
-        return creds["api_key"]
-    return os.environ.get("MOLTBOOK_API_KEY")
+def echo_error(error):
+    """Reports a failed API call."""
+    click.echo(f"Error: {describe_error(error)}", err=True)
 
 @click.group()
-def cli():
+@click.option('--profile', 'profile_file', type=click.Path(dir_okay=False), help='Profile the command and write pstats data to this file.')
+@click.option('--profile-top', default=20, type=int, help='Number of functions to list in the profile summary.')
+@click.pass_context
+def cli(ctx, profile_file, profile_top):
     """A CLI for interacting with the Moltbook API."""
-    pass
+    if profile_file:
+        try:
+            ctx.with_resource(CommandProfiler(profile_file, profile_top, stream=click.get_text_stream('stderr')))
+        except OSError as e:
+            raise click.FileError(profile_file, hint=str(e))
 
 @cli.command()
 @click.option('--name', prompt="Your agent's name", help="The name of your agent.")
 @click.option('--description', prompt="A short description of your agent", help="A description of what your agent does.")
 def register(name, description):
     """Register a new agent with Moltbook."""
-    url = f"{API_BASE_URL}/agents/register"
-    payload = {"name": name, "description": description}
     try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
+        data = MoltbookClient(auth=False).register(name, description)
 
         click.echo("🎉 Registration successful!")
         click.echo(json.dumps(data, indent=2))
@@ -58,48 +63,33 @@ def register(name, description):
         else:
             click.echo("⚠️ Could not find API key in response.")
 
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @cli.command()
 def status():
     """Check the claim status of your agent."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/status"
-    headers = {"Authorization": f"Bearer {api_key}"}
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.status(), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @cli.command()
-def me():
+@click.option('--fresh', is_flag=True, help='Bypass the local cache and fetch from the API.')
+def me(fresh):
     """Get your agent's profile."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/me"
-    headers = {"Authorization": f"Bearer {api_key}"}
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.me(cached=not fresh), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @click.group()
 def posts():
@@ -113,9 +103,8 @@ def posts():
 @click.option('--url', 'link_url', help='The URL for a link post.')
 def create(submolt, title, content, link_url):
     """Create a new post."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
     if not content and not link_url:
@@ -123,30 +112,12 @@ def create(submolt, title, content, link_url):
         # Prompt for content if neither is provided
         content = click.prompt("Please enter the content for the post")
 
-
-    post_url = f"{API_BASE_URL}/posts"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "submolt": submolt,
-        "title": title
-    }
-    if link_url:
-        payload['url'] = link_url
-    else:
-        payload['content'] = content
-
     try:
-        response = requests.post(post_url, headers=headers, json=payload)
-        response.raise_for_status()
+        data = client.create_post(title, submolt=submolt, content=content, url=link_url)
         click.echo("Post created successfully!")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @posts.command()
 @click.option('--sort', default='hot', type=click.Choice(['hot', 'new', 'top', 'rising']), help='The sort order for the feed.')
@@ -154,71 +125,44 @@ def create(submolt, title, content, link_url):
 @click.option('--submolt', help='Filter by a specific submolt.')
 def feed(sort, limit, submolt):
     """Get a feed of posts."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    feed_url = f"{API_BASE_URL}/posts"
-    params = {'sort': sort, 'limit': limit}
-    if submolt:
-        params['submolt'] = submolt
-
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(feed_url, headers=headers, params=params)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_posts(sort=sort, limit=limit, submolt=submolt), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @posts.command(name='get')
 @click.argument('post_id')
 def get_post(post_id):
     """Get a single post by its ID."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/posts/{post_id}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_post(post_id), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @posts.command(name='delete')
 @click.argument('post_id')
 def delete_post(post_id):
     """Delete a post you created."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
     if not click.confirm(f"Are you sure you want to delete post {post_id}?"):
         return
 
-    url = f"{API_BASE_URL}/posts/{post_id}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        client.delete_post(post_id)
         click.echo(f"Post {post_id} deleted successfully.")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @click.group()
 def comments():
@@ -231,52 +175,30 @@ def comments():
 @click.option('--parent-id', help='The ID of the comment to reply to.')
 def add_comment(post_id, content, parent_id):
     """Add a comment to a post."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/posts/{post_id}/comments"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {"content": content}
-    if parent_id:
-        payload['parent_id'] = parent_id
-
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+        data = client.add_comment(post_id, content, parent_id=parent_id)
         click.echo("Comment added successfully!")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @comments.command(name='list')
 @click.argument('post_id')
 @click.option('--sort', default='top', type=click.Choice(['top', 'new', 'controversial']), help='The sort order for comments.')
 def list_comments(post_id, sort):
     """List comments on a post."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/posts/{post_id}/comments"
-    params = {'sort': sort}
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_comments(post_id, sort=sort), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 
 
@@ -290,46 +212,32 @@ def vote():
 @click.option('--down', 'downvote', is_flag=True, help="Downvote instead of upvote.")
 def vote_post(post_id, downvote):
     """Upvote or downvote a post."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
     vote_type = "downvote" if downvote else "upvote"
-    url = f"{API_BASE_URL}/posts/{post_id}/{vote_type}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.post(url, headers=headers)
-        response.raise_for_status()
+        data = client.downvote_post(post_id) if downvote else client.upvote_post(post_id)
         click.echo(f"Successfully {vote_type}d post {post_id}.")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @vote.command(name='comment')
 @click.argument('comment_id')
 def vote_comment(comment_id):
     """Upvote a comment."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/comments/{comment_id}/upvote"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.post(url, headers=headers)
-        response.raise_for_status()
+        data = client.upvote_comment(comment_id)
         click.echo(f"Successfully upvoted comment {comment_id}.")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @click.group()
 def submolts():
@@ -339,43 +247,27 @@ def submolts():
 @submolts.command(name='list')
 def list_submolts():
     """List all submolts."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.list_submolts(), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @submolts.command(name='get')
 @click.argument('name')
 def get_submolt(name):
     """Get information about a submolt."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts/{name}"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_submolt(name), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @submolts.command(name='create')
 @click.option('--name', prompt=True, help='The name of the submolt.')
@@ -383,31 +275,16 @@ def get_submolt(name):
 @click.option('--description', prompt=True, help='A description of the submolt.')
 def create_submolt(name, display_name, description):
     """Create a new submolt."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "name": name,
-        "display_name": display_name,
-        "description": description
-    }
-
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+        data = client.create_submolt(name, display_name, description)
         click.echo("Submolt created successfully!")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @click.group()
 def profile():
@@ -416,40 +293,26 @@ def profile():
 
 @profile.command(name='get')
 @click.argument('name')
-def get_profile(name):
+@click.option('--fresh', is_flag=True, help='Bypass the local cache and fetch from the API.')
+def get_profile(name, fresh):
     """View a molty's profile."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/profile"
-    params = {'name': name}
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_profile(name, cached=not fresh), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @profile.command(name='update')
 @click.option('--description', help='Your updated description.')
 def update_profile(description):
     """Update your agent's profile."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/me"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
     payload = {}
     if description:
         payload['description'] = description
@@ -459,215 +322,162 @@ def update_profile(description):
         return
 
     try:
-        response = requests.patch(url, headers=headers, json=payload)
-        response.raise_for_status()
+        data = client.update_profile(**payload)
         click.echo("Profile updated successfully!")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 
 @submolts.command(name='subscribe')
 @click.argument('name')
 def subscribe(name):
     """Subscribe to a submolt."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts/{name}/subscribe"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.post(url, headers=headers)
-        response.raise_for_status()
+        client.subscribe(name)
         click.echo(f"Subscribed to {name} successfully!")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @submolts.command(name='unsubscribe')
 @click.argument('name')
 def unsubscribe(name):
     """Unsubscribe from a submolt."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts/{name}/subscribe"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        client.unsubscribe(name)
         click.echo(f"Unsubscribed from {name} successfully!")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @submolts.command(name='moderators')
 @click.argument('name')
 def list_moderators(name):
     """List moderators of a submolt."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts/{name}/moderators"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_moderators(name), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @submolts.command(name='add-moderator')
 @click.argument('name')
 @click.argument('agent_name')
 def add_moderator(name, agent_name):
     """Add a moderator to a submolt (owner only)."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts/{name}/moderators"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {"agent_name": agent_name, "role": "moderator"}
-
     try:
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
+        client.add_moderator(name, agent_name)
         click.echo(f"Added {agent_name} as a moderator to {name}.")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @submolts.command(name='remove-moderator')
 @click.argument('name')
 @click.argument('agent_name')
 def remove_moderator(name, agent_name):
     """Remove a moderator from a submolt (owner only)."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/submolts/{name}/moderators"
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
-    payload = {"agent_name": agent_name}
-
     try:
-        response = requests.delete(url, headers=headers, json=payload)
-        response.raise_for_status()
+        client.remove_moderator(name, agent_name)
         click.echo(f"Removed {agent_name} as a moderator from {name}.")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @posts.command(name='pin')
 @click.argument('post_id')
 def pin_post(post_id):
     """Pin a post in a submolt (mods only)."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/posts/{post_id}/pin"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.post(url, headers=headers)
-        response.raise_for_status()
+        client.pin_post(post_id)
         click.echo(f"Post {post_id} pinned successfully.")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @posts.command(name='unpin')
 @click.argument('post_id')
 def unpin_post(post_id):
     """Unpin a post in a submolt (mods only)."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/posts/{post_id}/pin"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        client.unpin_post(post_id)
         click.echo(f"Post {post_id} unpinned successfully.")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @profile.command(name='avatar')
-@click.argument('file_path', type=click.Path(exists=True))
-def upload_avatar(file_path):
+@click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--optimize', is_flag=True, help='Downscale and recompress the image before uploading (requires Pillow).')
+@click.option('--max-dimension', default=512, type=click.IntRange(min=1), help='Largest width or height to keep when optimizing.')
+@click.option('--force', is_flag=True, help='Upload even if this avatar was already uploaded.')
+def upload_avatar(file_path, optimize, max_dimension, force):
     """Upload your agent's avatar."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/me/avatar"
-    headers = {"Authorization": f"Bearer {api_key}"}
+    try:
+        avatar = client.prepare_avatar(file_path, optimize, max_dimension)
+    except ImportError:
+        click.echo("Error: --optimize requires Pillow. Install it with `pip install Pillow`.", err=True)
+        return
+    except MoltbookError as e:
+        hint = "Try a smaller --max-dimension." if optimize else "Try --optimize."
+        click.echo(f"Error: {e} {hint}", err=True)
+        return
+    except OSError as e:
+        click.echo(f"Error: Could not read image {file_path}. {e}", err=True)
+        return
 
-    with open(file_path, 'rb') as f:
-        files = {'file': f}
-        try:
-            response = requests.post(url, headers=headers, files=files)
-            response.raise_for_status()
-            click.echo("Avatar uploaded successfully!")
-        except requests.exceptions.HTTPError as e:
-            click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
-        except requests.exceptions.RequestException as e:
-            click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+    with avatar:
+        if not force and client.avatar_is_current(avatar):
+            click.echo("Avatar is unchanged, skipping upload. Use --force to upload anyway.")
+            return
+
+        with click.progressbar(length=avatar.size, label="Uploading avatar", file=click.get_text_stream('stderr')) as bar:
+            try:
+                client.send_avatar(avatar, progress=bar.update)
+            except requests.exceptions.RequestException as e:
+                echo_error(e)
+                return
+
+    click.echo("Avatar uploaded successfully!")
 
 @profile.command(name='remove-avatar')
 def remove_avatar():
     """Remove your agent's avatar."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/me/avatar"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        client.remove_avatar()
         click.echo("Avatar removed successfully.")
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @cli.command()
 @click.argument('query')
@@ -675,94 +485,159 @@ def remove_avatar():
 @click.option('--limit', default=20, type=int, help='Max results to return.')
 def search(query, search_type, limit):
     """Perform a semantic search for posts and comments."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/search"
-    params = {
-        'q': query,
-        'type': search_type,
-        'limit': limit
-    }
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.search(query, type=search_type, limit=limit), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @cli.command()
 @click.argument('name')
 def follow(name):
     """Follow a molty."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/{name}/follow"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.post(url, headers=headers)
-        response.raise_for_status()
+        data = client.follow(name)
         click.echo(f"You are now following {name}.")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @cli.command()
 @click.argument('name')
 def unfollow(name):
     """Unfollow a molty."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/agents/{name}/follow"
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.delete(url, headers=headers)
-        response.raise_for_status()
+        data = client.unfollow(name)
         click.echo(f"You have unfollowed {name}.")
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(data, indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
 
 @cli.command(name='feed')
 @click.option('--sort', default='hot', type=click.Choice(['hot', 'new', 'top']), help='The sort order for the feed.')
 @click.option('--limit', default=25, type=int, help='The number of posts to retrieve.')
 def personal_feed(sort, limit):
     """Get your personalized feed."""
-    api_key = get_api_key()
-    if not api_key:
-        click.echo("API key not found. Please run `register` or set MOLTBOOK_API_KEY.", err=True)
+    client = get_client()
+    if not client:
         return
 
-    url = f"{API_BASE_URL}/feed"
-    params = {'sort': sort, 'limit': limit}
-    headers = {"Authorization": f"Bearer {api_key}"}
-
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        click.echo(json.dumps(response.json(), indent=2))
-    except requests.exceptions.HTTPError as e:
-        click.echo(f"Error: {e.response.status_code} - {e.response.text}", err=True)
+        click.echo(json.dumps(client.get_feed(sort=sort, limit=limit), indent=2))
     except requests.exceptions.RequestException as e:
-        click.echo(f"Error: Could not connect to Moltbook API. {e}", err=True)
+        echo_error(e)
+
+@click.group()
+def following():
+    """Commands for managing who you follow."""
+    pass
+
+def read_agent_names(fileobj):
+    """Reads agent names from a JSON list or a file with one name per line."""
+    text = fileobj.read()
+    try:
+        names = json.loads(text)
+    except json.JSONDecodeError:
+        names = [line.split('#', 1)[0] for line in text.splitlines()]
+    if not isinstance(names, list):
+        raise click.BadParameter("Expected a JSON list or one agent name per line.")
+    return {str(name).strip() for name in names if str(name).strip()}
+
+@following.command(name='list')
+def list_following():
+    """List the agents you are known to follow."""
+    client = get_client()
+    if not client:
+        return
+
+    click.echo(json.dumps(client.following(), indent=2))
+
+@following.command(name='diff')
+@click.argument('desired_file', type=click.File('r'))
+@click.option('--dry-run', is_flag=True, help='Only show what would change.')
+@click.option('--keep-others', is_flag=True, help='Do not unfollow agents missing from the file.')
+def diff_following(desired_file, dry_run, keep_others):
+    """Follow and unfollow agents so you follow exactly those in DESIRED_FILE.
+
+    The current follow set is the one recorded locally by `follow`, `unfollow`
+    and previous runs, so only the difference is sent to the API.
+    """
+    client = get_client()
+    if not client:
+        return
+
+    desired = read_agent_names(desired_file)
+    result = client.sync_following(desired, keep_others=keep_others, dry_run=dry_run)
+    click.echo(json.dumps(result, indent=2))
+
+def load_desired_state(fileobj):
+    """Parses a desired-state file as JSON, or as YAML when PyYAML is installed."""
+    text = fileobj.read()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        import yaml
+    except ImportError:
+        raise click.BadParameter("File is not valid JSON. Install PyYAML to use YAML files.")
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise click.BadParameter(f"File is neither valid JSON nor YAML. {e}")
+
+@cli.command(name='apply')
+@click.argument('state_file', type=click.File('r'))
+@click.option('--dry-run', is_flag=True, help='Only show the planned changes.')
+@click.option('--rate', default=API_RATE_LIMIT, type=click.IntRange(min=1), help='Maximum requests per minute.')
+def apply_state(state_file, dry_run, rate):
+    """Bring submolt subscriptions, moderators and pins in line with STATE_FILE.
+
+    STATE_FILE is JSON or YAML of the form
+    `{"submolts": {"NAME": {"subscribed": true, "moderators": [...], "pinned": [...]}}}`.
+    The current state is read concurrently and only the differing writes are sent.
+    """
+    client = get_client()
+    if not client:
+        return
+
+    state = load_desired_state(state_file)
+    if not isinstance(state, dict) or "submolts" not in state:
+        click.echo("Error: State file must contain a `submolts` mapping.", err=True)
+        return
+    desired = state["submolts"]
+
+    try:
+        result = client.apply_state(desired, dry_run=dry_run, rate=rate)
+    except MoltbookError as e:
+        click.echo(f"Error: {e}", err=True)
+        return
+    click.echo(json.dumps(result, indent=2))
+
+@cli.command()
+@click.option('--interval', default=4.0, type=float, help='Hours to wait between check-ins.')
+@click.option('--force', is_flag=True, help='Run the check-in even if it is not due yet.')
+@click.option('--limit', default=10, type=int, help='The number of new posts to fetch from each feed.')
+@click.option('--state-file', default=HEARTBEAT_STATE_FILE, type=click.Path(dir_okay=False), help='Where to keep the heartbeat state.')
+def heartbeat(interval, force, limit, state_file):
+    """Run one Moltbook check-in: status, personal feed and new posts."""
+    client = get_client()
+    if not client:
+        return
+
+    summary = client.heartbeat(interval=interval, force=force, limit=limit, state_file=state_file)
+    click.echo(json.dumps(summary, indent=2))
 
 
 cli.add_command(posts)
@@ -770,6 +645,7 @@ cli.add_command(comments)
 cli.add_command(vote)
 cli.add_command(submolts)
 cli.add_command(profile)
+cli.add_command(following)
 
 if __name__ == '__main__':
     cli()
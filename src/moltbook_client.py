@@ -0,0 +1,965 @@
+import asyncio
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # Windows: files are only locked between threads
+    fcntl = None
+
+API_BASE_URL = "https://www.moltbook.com/api/v1"
+CONFIG_DIR = os.path.expanduser("~/.config/moltbook")
+CREDENTIALS_FILE = os.path.join(CONFIG_DIR, "credentials.json")
+HEARTBEAT_STATE_FILE = os.path.join(CONFIG_DIR, "heartbeat-state.json")
+HEARTBEAT_SEEN_LIMIT = 500
+AVATAR_CACHE_FILE = os.path.join(CONFIG_DIR, "avatar-cache.json")
+AVATAR_MAX_BYTES = 500 * 1024
+AVATAR_CHUNK_SIZE = 64 * 1024
+AGENT_CACHE_FILE = os.path.join(CONFIG_DIR, "agent-cache.json")
+AGENT_CACHE_TTL = 5 * 60
+AGENT_CACHE_MAX_STALE = 24 * 3600
+API_WORKERS = 4
+API_RATE_LIMIT = 100
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+class MoltbookError(Exception):
+    """Raised for problems detected on the client side, before or after the API calls."""
+
+
+def load_credentials():
+    """Loads credentials from the credentials file."""
+    try:
+        with open(CREDENTIALS_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        return None
+
+def get_api_key():
+    """Gets the API key from credentials file or environment variable."""
+    creds = load_credentials()
+    if creds and "api_key" in creds:
+        return creds["api_key"]
+    return os.environ.get("MOLTBOOK_API_KEY")
+
+@contextmanager
+def locked_file(path):
+    """Holds an exclusive lock on `path` against other threads and processes.
+
+    The lock is taken on a `.lock` file next to `path`, so `path` itself can
+    be replaced while it is held.
+    """
+    with _file_locks_guard:
+        thread_lock = _file_locks.setdefault(path, threading.Lock())
+    with thread_lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{path}.lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+def read_json_file(path):
+    """Loads a JSON object from `path`, falling back to an empty one."""
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def update_json_file(path, mutate):
+    """Applies `mutate` to the JSON object in `path` and saves it.
+
+    The read-modify-write holds `locked_file(path)`, and the new content is
+    written to a temporary file and moved into place, so concurrent readers
+    never see a partial file and concurrent writers never lose updates.
+    """
+    with locked_file(path):
+        data = read_json_file(path)
+        mutate(data)
+        tmp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_file, path)
+
+def api_key_fingerprint(api_key):
+    """Identifies an agent in local caches without storing its API key."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+def load_agent_cache():
+    """Loads the agent directory cache."""
+    return read_json_file(AGENT_CACHE_FILE)
+
+def update_agent_cache(api_key, mutate):
+    """Applies `mutate` to this agent's section of the cache and saves it.
+
+    The section holds `entries` (cached /agents responses keyed by lookup) and
+    `following` (the names this agent is known to follow).
+    """
+    def apply(cache):
+        section = cache.setdefault(api_key_fingerprint(api_key), {})
+        section.setdefault("entries", {})
+        section.setdefault("following", [])
+        mutate(section)
+    update_json_file(AGENT_CACHE_FILE, apply)
+
+def invalidate_agent_cache(api_key, *keys):
+    """Drops cached lookups that a write has made out of date."""
+    def drop(section):
+        for key in keys:
+            section["entries"].pop(key, None)
+    update_agent_cache(api_key, drop)
+
+def get_following(api_key):
+    """Returns the set of agents this agent is known to follow."""
+    section = load_agent_cache().get(api_key_fingerprint(api_key), {})
+    return set(section.get("following", []))
+
+def set_following(api_key, names, following):
+    """Records follows or unfollows and invalidates the affected lookups."""
+    def record(section):
+        current = set(section["following"])
+        for name in names:
+            if following:
+                current.add(name)
+            else:
+                current.discard(name)
+            section["entries"].pop(f"profile:{name}", None)
+        section["following"] = sorted(current)
+        section["entries"].pop("me", None)
+    update_agent_cache(api_key, record)
+
+class RateLimiter:
+    """Blocks callers so that at most `per_minute` calls start in any minute."""
+
+    def __init__(self, per_minute):
+        if per_minute < 1:
+            raise ValueError("per_minute must be at least 1")
+        self._per_minute = per_minute
+        self._starts = deque()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= 60:
+                    self._starts.popleft()
+                if len(self._starts) < self._per_minute:
+                    self._starts.append(now)
+                    return
+                time.sleep(60 - (now - self._starts[0]))
+
+def describe_error(error):
+    """Formats a requests exception the way the CLI reports it."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return f"{error.response.status_code} - {error.response.text}"
+    return f"Could not connect to Moltbook API. {error}"
+
+class MultipartUpload:
+    """A multipart/form-data body that streams a single file and reports progress."""
+
+    def __init__(self, field, filename, fileobj, size, content_type, callback=None):
+        boundary = uuid.uuid4().hex
+        filename = filename.replace('"', '')
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+        self._callback = callback
+        self.len = len(head) + size + len(tail)
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+        chunks = []
+        while size > 0 and self._parts:
+            chunk = self._parts[0].read(min(size, AVATAR_CHUNK_SIZE))
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            size -= len(chunk)
+        data = b"".join(chunks)
+        if data and self._callback:
+            self._callback(len(data))
+        return data
+
+class Avatar:
+    """An avatar image ready to upload: an open file object plus its metadata."""
+
+    def __init__(self, fileobj, size, filename, content_type, digest):
+        self.fileobj = fileobj
+        self.size = size
+        self.filename = filename
+        self.content_type = content_type
+        self.digest = digest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.fileobj.close()
+        return False
+
+def file_sha256(fileobj):
+    """Hashes a file object in chunks and rewinds it."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(AVATAR_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+def load_avatar_cache():
+    """Loads the avatar hash cache."""
+    return read_json_file(AVATAR_CACHE_FILE)
+
+def set_avatar_digest(api_key, digest):
+    """Records the hash of this agent's current avatar, or forgets it if `digest` is None."""
+    def store(cache):
+        if digest is None:
+            cache.pop(api_key_fingerprint(api_key), None)
+        else:
+            cache[api_key_fingerprint(api_key)] = digest
+    update_json_file(AVATAR_CACHE_FILE, store)
+
+def optimize_avatar(file_path, max_dimension):
+    """Downscales and recompresses an image until it fits the avatar size limit.
+
+    Returns the encoded bytes, a filename and a content type. Requires Pillow.
+    """
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        img.thumbnail((max_dimension, max_dimension))
+        has_alpha = img.mode in ("RGBA", "LA", "P")
+        base = os.path.splitext(os.path.basename(file_path))[0]
+
+        if has_alpha:
+            img = img.convert("RGBA")
+            attempts = [("PNG", {"optimize": True})]
+            attempts += [("WEBP", {"quality": q}) for q in (90, 80, 70, 60)]
+        else:
+            img = img.convert("RGB")
+            attempts = [("JPEG", {"quality": q, "optimize": True}) for q in (90, 80, 70, 60, 50)]
+
+        for image_format, options in attempts:
+            buffer = io.BytesIO()
+            img.save(buffer, format=image_format, **options)
+            if buffer.tell() <= AVATAR_MAX_BYTES:
+                break
+
+    extension = {"PNG": ".png", "WEBP": ".webp", "JPEG": ".jpg"}[image_format]
+    return buffer.getvalue(), base + extension, Image.MIME[image_format]
+
+def load_heartbeat_state(state_file, api_key):
+    """Loads this agent's heartbeat state, falling back to an empty one."""
+    state = read_json_file(state_file).get(api_key_fingerprint(api_key))
+    if not isinstance(state, dict):
+        state = {}
+    state.setdefault("lastMoltbookCheck", None)
+    state.setdefault("seenPostIds", [])
+    return state
+
+def save_heartbeat_state(state_file, api_key, state):
+    """Saves this agent's heartbeat state, keeping only the most recent seen post IDs."""
+    state["seenPostIds"] = state["seenPostIds"][-HEARTBEAT_SEEN_LIMIT:]
+
+    def store(states):
+        states[api_key_fingerprint(api_key)] = state
+    update_json_file(state_file, store)
+
+def extract_posts(data):
+    """Pulls the list of posts out of a feed response."""
+    if isinstance(data, list):
+        return data
+    for key in ("posts", "data"):
+        if isinstance(data.get(key), list):
+            return data[key]
+    return []
+
+def summarize_post(post):
+    """Reduces a post to the fields worth reporting in a heartbeat."""
+    author = post.get("author")
+    submolt = post.get("submolt")
+    return {
+        "id": post.get("id"),
+        "title": post.get("title"),
+        "author": author.get("name") if isinstance(author, dict) else author,
+        "submolt": submolt.get("name") if isinstance(submolt, dict) else submolt,
+    }
+
+def extract_items(data, *keys):
+    """Pulls a list out of a response, whether bare or under one of `keys`."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in keys + ("data",):
+            if isinstance(data.get(key), list):
+                return data[key]
+    return []
+
+def item_name(item):
+    """Returns the name of an agent, submolt or post entry in a response."""
+    if not isinstance(item, dict):
+        return item
+    for key in ("name", "agent_name", "id"):
+        if item.get(key) is not None:
+            return item[key]
+    agent = item.get("agent")
+    return agent.get("name") if isinstance(agent, dict) else None
+
+def validate_desired_state(desired):
+    """Checks the shape of a desired submolt state, raising MoltbookError if it is wrong."""
+    if not isinstance(desired, dict):
+        raise MoltbookError("`submolts` must be a mapping of submolt names to settings.")
+    for name, spec in desired.items():
+        if spec is None:
+            continue
+        if not isinstance(spec, dict):
+            raise MoltbookError(f"Settings for submolt `{name}` must be a mapping.")
+        if "subscribed" in spec and not isinstance(spec["subscribed"], bool):
+            raise MoltbookError(f"`subscribed` for submolt `{name}` must be true or false.")
+        for key in ("moderators", "pinned"):
+            if key in spec and not isinstance(spec[key], (list, type(None))):
+                raise MoltbookError(f"`{key}` for submolt `{name}` must be a list.")
+        for moderator in spec.get("moderators") or []:
+            if not isinstance(moderator, str):
+                raise MoltbookError(f"`moderators` for submolt `{name}` must list agent names, got {moderator!r}.")
+        for post_id in spec.get("pinned") or []:
+            if isinstance(post_id, bool) or not isinstance(post_id, (str, int)):
+                raise MoltbookError(f"`pinned` for submolt `{name}` must list post IDs, got {post_id!r}.")
+
+def plan_submolt_changes(desired, submolt_list, moderators, infos):
+    """Computes the writes needed to move from the current to the desired state.
+
+    `desired` maps submolt names to optional `subscribed`, `moderators` and
+    `pinned` keys; anything left out is not managed. When a response does not
+    report the current state, the desired state is applied unconditionally.
+    Returns `(removals, additions)` lists of `(action, submolt, target)`.
+    """
+    listed = {item_name(item): item for item in extract_items(submolt_list, "submolts") if isinstance(item, dict)}
+    removals = []
+    additions = []
+
+    for name, spec in sorted(desired.items()):
+        spec = spec or {}
+
+        if "subscribed" in spec:
+            current = listed.get(name, {}).get("is_subscribed", listed.get(name, {}).get("subscribed"))
+            if spec["subscribed"] and current is not True:
+                additions.append(("subscribe", name, None))
+            elif not spec["subscribed"] and current is not False:
+                removals.append(("unsubscribe", name, None))
+
+        if "moderators" in spec:
+            wanted = set(spec["moderators"] or [])
+            current = {
+                item_name(item): item.get("role") if isinstance(item, dict) else None
+                for item in extract_items(moderators.get(name), "moderators")
+            }
+            for agent_name in sorted(wanted - set(current)):
+                additions.append(("add-moderator", name, agent_name))
+            for agent_name in sorted(set(current) - wanted):
+                if current[agent_name] != "owner":
+                    removals.append(("remove-moderator", name, agent_name))
+
+        if "pinned" in spec:
+            wanted = {str(post_id) for post_id in spec["pinned"] or []}
+            info = infos.get(name) or {}
+            info = info.get("submolt", info) if isinstance(info, dict) else {}
+            pinned = info.get("pinned_posts", info.get("pinned")) if isinstance(info, dict) else None
+            current = {str(item_name(item)) for item in pinned} if isinstance(pinned, list) else set()
+            for post_id in sorted(wanted - current):
+                additions.append(("pin", name, post_id))
+            if isinstance(pinned, list):
+                for post_id in sorted(current - wanted):
+                    removals.append(("unpin", name, post_id))
+
+    return removals, additions
+
+def submolt_change_call(action, submolt, target):
+    """Maps a planned change to the `(method, path, kwargs)` that performs it."""
+    if action in ("subscribe", "unsubscribe"):
+        method = "POST" if action == "subscribe" else "DELETE"
+        return method, f"/submolts/{submolt}/subscribe", {}
+    if action == "add-moderator":
+        return "POST", f"/submolts/{submolt}/moderators", {'json': {"agent_name": target, "role": "moderator"}}
+    if action == "remove-moderator":
+        return "DELETE", f"/submolts/{submolt}/moderators", {'json': {"agent_name": target}}
+    method = "POST" if action == "pin" else "DELETE"
+    return method, f"/posts/{target}/pin", {}
+
+
+class MoltbookClient:
+    """A synchronous client for the Moltbook API.
+
+    Every method returns the parsed JSON response (or None for an empty body)
+    and raises `requests.exceptions.HTTPError` or `RequestException` on failure,
+    like the CLI commands built on top of it. Requests share one session, so
+    connections are reused across calls.
+
+    The session is also shared by the worker threads of `run_calls` and of
+    AsyncMoltbookClient. This relies on urllib3's connection pool being
+    thread-safe and on the session's headers and settings not changing after
+    construction; requests does not formally guarantee more than that, so do
+    not modify `session` while calls are in flight.
+
+    Without an `api_key` the key is looked up like the CLI does, and
+    MoltbookError is raised if there is none. With `auth` false no key is used
+    and requests are sent unauthenticated; that is only useful for `register`.
+    """
+
+    def __init__(self, api_key=None, base_url=API_BASE_URL, auth=True, background_refresh=True):
+        self.api_key = (api_key or get_api_key()) if auth else None
+        if auth and not self.api_key:
+            raise MoltbookError("API key not found. Please run `register` or set MOLTBOOK_API_KEY.")
+        self.base_url = base_url
+        self.background_refresh = background_refresh
+        self.session = requests.Session()
+        if self.api_key:
+            self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def request(self, method, path, **kwargs):
+        """Sends a request to `path` under the API base URL and parses the response."""
+        response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def run_calls(self, calls, max_workers=API_WORKERS, limiter=None):
+        """Runs API calls concurrently.
+
+        `calls` maps a key to `(method, path, kwargs)`. Returns `(results, errors)`,
+        dicts keyed like `calls` holding the parsed response and the error
+        message respectively.
+        """
+        results = {}
+        errors = {}
+        if not calls:
+            return results, errors
+
+        def call(method, path, kwargs):
+            if limiter:
+                limiter.wait()
+            return self.request(method, path, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+            futures = {key: executor.submit(call, *spec) for key, spec in calls.items()}
+
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except requests.exceptions.RequestException as e:
+                errors[key] = describe_error(e)
+        return results, errors
+
+    def _cached_agent_lookup(self, key, path, params=None):
+        """Returns an /agents response, served from the cache when possible.
+
+        Entries younger than AGENT_CACHE_TTL are returned as is. With
+        `background_refresh`, older entries are returned immediately while a daemon
+        thread refetches them; otherwise, and for entries past AGENT_CACHE_MAX_STALE
+        or missing ones, they are fetched first. Short-lived processes such as the
+        CLI turn `background_refresh` off, as they would exit before it finished.
+        """
+        def fetch():
+            data = self.request("GET", path, params=params)
+
+            def store(section):
+                section["entries"][key] = {"fetched_at": time.time(), "data": data}
+            update_agent_cache(self.api_key, store)
+            return data
+
+        def refresh():
+            try:
+                fetch()
+            except requests.exceptions.RequestException:
+                pass
+
+        section = load_agent_cache().get(api_key_fingerprint(self.api_key), {})
+        entry = section.get("entries", {}).get(key)
+        age = None if entry is None else time.time() - entry["fetched_at"]
+        if age is None or age > AGENT_CACHE_MAX_STALE:
+            return fetch()
+        if age > AGENT_CACHE_TTL:
+            if not self.background_refresh:
+                return fetch()
+            threading.Thread(target=refresh, daemon=True).start()
+        return entry["data"]
+
+    # Agents
+
+    def register(self, name, description):
+        """Registers a new agent. The response holds its API key.
+
+        Always sent without an Authorization header, even on an authenticated client.
+        """
+        payload = {"name": name, "description": description}
+        return self.request("POST", "/agents/register", json=payload, headers={"Authorization": None})
+
+    def status(self):
+        return self.request("GET", "/agents/status")
+
+    def me(self, cached=False):
+        """Gets your profile; `cached=True` serves it from the agent cache."""
+        if cached:
+            return self._cached_agent_lookup("me", "/agents/me")
+        return self.request("GET", "/agents/me")
+
+    def get_profile(self, name, cached=False):
+        """Gets another agent's profile; `cached=True` serves it from the agent cache."""
+        params = {'name': name}
+        if cached:
+            return self._cached_agent_lookup(f"profile:{name}", "/agents/profile", params=params)
+        return self.request("GET", "/agents/profile", params=params)
+
+    def update_profile(self, **fields):
+        data = self.request("PATCH", "/agents/me", json=fields)
+        invalidate_agent_cache(self.api_key, "me")
+        return data
+
+    def prepare_avatar(self, file_path, optimize=False, max_dimension=512):
+        """Opens (or, with `optimize`, downscales and recompresses) an avatar image.
+
+        Raises MoltbookError if `max_dimension` is below 1 or the result is over
+        the size limit, ImportError if `optimize` is set without Pillow installed
+        and OSError if the image cannot be read.
+        """
+        if max_dimension < 1:
+            raise MoltbookError(f"max_dimension must be at least 1, got {max_dimension}.")
+        if optimize:
+            data, filename, content_type = optimize_avatar(file_path, max_dimension)
+            fileobj = io.BytesIO(data)
+            size = len(data)
+        else:
+            filename = os.path.basename(file_path)
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            size = os.path.getsize(file_path)
+            fileobj = open(file_path, 'rb')
+
+        if size > AVATAR_MAX_BYTES:
+            fileobj.close()
+            raise MoltbookError(f"Avatar is {size // 1024} KB, the maximum is {AVATAR_MAX_BYTES // 1024} KB.")
+        return Avatar(fileobj, size, filename, content_type, file_sha256(fileobj))
+
+    def avatar_is_current(self, avatar):
+        """Whether `avatar` is the one last uploaded for this agent."""
+        return load_avatar_cache().get(api_key_fingerprint(self.api_key)) == avatar.digest
+
+    def send_avatar(self, avatar, progress=None):
+        """Streams a prepared avatar to the API, calling `progress(bytes)` as it goes."""
+        body = MultipartUpload('file', avatar.filename, avatar.fileobj, avatar.size, avatar.content_type, callback=progress)
+        data = self.request("POST", "/agents/me/avatar", data=body, headers={"Content-Type": body.content_type})
+        set_avatar_digest(self.api_key, avatar.digest)
+        invalidate_agent_cache(self.api_key, "me")
+        return data
+
+    def upload_avatar(self, file_path, optimize=False, max_dimension=512, force=False, progress=None):
+        """Uploads an avatar unless it is already the current one.
+
+        Returns the API response, or None when the upload was skipped.
+        """
+        with self.prepare_avatar(file_path, optimize, max_dimension) as avatar:
+            if not force and self.avatar_is_current(avatar):
+                return None
+            return self.send_avatar(avatar, progress)
+
+    def remove_avatar(self):
+        data = self.request("DELETE", "/agents/me/avatar")
+        if api_key_fingerprint(self.api_key) in load_avatar_cache():
+            set_avatar_digest(self.api_key, None)
+        invalidate_agent_cache(self.api_key, "me")
+        return data
+
+    def follow(self, name):
+        data = self.request("POST", f"/agents/{name}/follow")
+        set_following(self.api_key, [name], True)
+        return data
+
+    def unfollow(self, name):
+        data = self.request("DELETE", f"/agents/{name}/follow")
+        set_following(self.api_key, [name], False)
+        return data
+
+    def following(self):
+        """Lists the agents you are known to follow, from the local agent cache."""
+        return sorted(get_following(self.api_key))
+
+    def sync_following(self, desired, keep_others=False, dry_run=False):
+        """Follows and unfollows agents so that you follow exactly `desired`.
+
+        Only the difference from the locally recorded follow set is sent. With
+        `dry_run` the plan is returned instead; otherwise a result with the
+        applied changes and any per-agent errors.
+        """
+        desired = set(desired)
+        current = get_following(self.api_key)
+        plan = {
+            "follow": sorted(desired - current),
+            "unfollow": [] if keep_others else sorted(current - desired),
+        }
+        if dry_run:
+            return plan
+
+        calls = {
+            (action, name): ("POST" if action == "follow" else "DELETE", f"/agents/{name}/follow", {})
+            for action, names in plan.items() for name in names
+        }
+        _, errors = self.run_calls(calls, limiter=RateLimiter(API_RATE_LIMIT))
+
+        result = {"follow": [], "unfollow": [], "errors": {}}
+        for action, name in calls:
+            if (action, name) in errors:
+                result["errors"][name] = errors[(action, name)]
+            else:
+                result[action].append(name)
+
+        set_following(self.api_key, result["follow"], True)
+        set_following(self.api_key, result["unfollow"], False)
+        if not result["errors"]:
+            del result["errors"]
+        return result
+
+    # Posts and comments
+
+    def create_post(self, title, submolt='general', content=None, url=None):
+        payload = {"submolt": submolt, "title": title}
+        if url:
+            payload['url'] = url
+        else:
+            payload['content'] = content
+        return self.request("POST", "/posts", json=payload)
+
+    def get_posts(self, sort='hot', limit=25, submolt=None):
+        params = {'sort': sort, 'limit': limit}
+        if submolt:
+            params['submolt'] = submolt
+        return self.request("GET", "/posts", params=params)
+
+    def get_post(self, post_id):
+        return self.request("GET", f"/posts/{post_id}")
+
+    def delete_post(self, post_id):
+        return self.request("DELETE", f"/posts/{post_id}")
+
+    def pin_post(self, post_id):
+        return self.request("POST", f"/posts/{post_id}/pin")
+
+    def unpin_post(self, post_id):
+        return self.request("DELETE", f"/posts/{post_id}/pin")
+
+    def add_comment(self, post_id, content, parent_id=None):
+        payload = {"content": content}
+        if parent_id:
+            payload['parent_id'] = parent_id
+        return self.request("POST", f"/posts/{post_id}/comments", json=payload)
+
+    def get_comments(self, post_id, sort='top'):
+        return self.request("GET", f"/posts/{post_id}/comments", params={'sort': sort})
+
+    def upvote_post(self, post_id):
+        return self.request("POST", f"/posts/{post_id}/upvote")
+
+    def downvote_post(self, post_id):
+        return self.request("POST", f"/posts/{post_id}/downvote")
+
+    def upvote_comment(self, comment_id):
+        return self.request("POST", f"/comments/{comment_id}/upvote")
+
+    def get_feed(self, sort='hot', limit=25):
+        """Gets your personalized feed of subscribed submolts and followed agents."""
+        return self.request("GET", "/feed", params={'sort': sort, 'limit': limit})
+
+    def search(self, query, type='all', limit=20):
+        return self.request("GET", "/search", params={'q': query, 'type': type, 'limit': limit})
+
+    # Submolts
+
+    def list_submolts(self):
+        return self.request("GET", "/submolts")
+
+    def get_submolt(self, name):
+        return self.request("GET", f"/submolts/{name}")
+
+    def create_submolt(self, name, display_name, description):
+        payload = {"name": name, "display_name": display_name, "description": description}
+        return self.request("POST", "/submolts", json=payload)
+
+    def subscribe(self, name):
+        return self.request("POST", f"/submolts/{name}/subscribe")
+
+    def unsubscribe(self, name):
+        return self.request("DELETE", f"/submolts/{name}/subscribe")
+
+    def get_moderators(self, name):
+        return self.request("GET", f"/submolts/{name}/moderators")
+
+    def add_moderator(self, name, agent_name):
+        return self.request("POST", f"/submolts/{name}/moderators", json={"agent_name": agent_name, "role": "moderator"})
+
+    def remove_moderator(self, name, agent_name):
+        return self.request("DELETE", f"/submolts/{name}/moderators", json={"agent_name": agent_name})
+
+    def apply_state(self, desired, dry_run=False, rate=API_RATE_LIMIT):
+        """Brings submolt subscriptions, moderators and pins in line with `desired`.
+
+        `desired` maps submolt names to optional `subscribed`, `moderators` and
+        `pinned` keys. The current state is read concurrently and only the
+        differing writes are sent, removals first, at most `rate` per minute.
+        Returns the plan with `dry_run`, otherwise the applied changes and errors.
+        Raises MoltbookError if `desired` is malformed or the current state
+        cannot be read.
+        """
+        validate_desired_state(desired)
+        limiter = RateLimiter(rate)
+        reads = {("list", None): ("GET", "/submolts", {})}
+        for name, spec in desired.items():
+            spec = spec or {}
+            if "moderators" in spec:
+                reads[("moderators", name)] = ("GET", f"/submolts/{name}/moderators", {})
+            if "pinned" in spec:
+                reads[("info", name)] = ("GET", f"/submolts/{name}", {})
+        results, errors = self.run_calls(reads, limiter=limiter)
+        if errors:
+            raise MoltbookError("\n".join(
+                f"Could not read {kind}{f' of {name}' if name else ''}: {message}"
+                for (kind, name), message in errors.items()
+            ))
+
+        removals, additions = plan_submolt_changes(
+            desired,
+            results[("list", None)],
+            {name: data for (kind, name), data in results.items() if kind == "moderators"},
+            {name: data for (kind, name), data in results.items() if kind == "info"},
+        )
+        if dry_run:
+            return [{"action": action, "submolt": submolt, "target": target} for action, submolt, target in removals + additions]
+
+        result = {"applied": [], "errors": []}
+        # Removals go first so that, e.g., unpinning frees a slot before pinning.
+        for changes in (removals, additions):
+            calls = {change: submolt_change_call(*change) for change in changes}
+            _, errors = self.run_calls(calls, limiter=limiter)
+            for action, submolt, target in changes:
+                entry = {"action": action, "submolt": submolt, "target": target}
+                if (action, submolt, target) in errors:
+                    entry["error"] = errors[(action, submolt, target)]
+                    result["errors"].append(entry)
+                else:
+                    result["applied"].append(entry)
+
+        if not result["errors"]:
+            del result["errors"]
+        return result
+
+    # Heartbeat
+
+    def heartbeat(self, interval=4.0, force=False, limit=10, state_file=HEARTBEAT_STATE_FILE):
+        """Runs one check-in: claim status, personal feed and new posts, fetched concurrently.
+
+        Skips the cycle if this agent's last one in `state_file` ran less than
+        `interval` hours ago, unless `force` is set. Returns a summary of posts
+        not seen in earlier cycles.
+        """
+        state = load_heartbeat_state(state_file, self.api_key)
+        now = time.time()
+        last_check = state["lastMoltbookCheck"]
+        if not force and last_check and now - last_check < interval * 3600:
+            next_check = (last_check + interval * 3600 - now) / 60
+            return {"skipped": True, "next_check_in_minutes": round(next_check)}
+
+        checks = {
+            "status": ("GET", "/agents/status", {}),
+            "feed": ("GET", "/feed", {'params': {'sort': 'new', 'limit': limit}}),
+            "posts": ("GET", "/posts", {'params': {'sort': 'new', 'limit': limit}}),
+        }
+        results, errors = self.run_calls(checks, max_workers=len(checks))
+
+        seen = set(state["seenPostIds"])
+        summary = {"status": (results.get("status") or {}).get("status")}
+        for name in ("feed", "posts"):
+            if name not in results:
+                continue
+            new_posts = []
+            for post in extract_posts(results[name] or {}):
+                post_id = post.get("id")
+                if post_id is None or post_id in seen:
+                    continue
+                seen.add(post_id)
+                state["seenPostIds"].append(post_id)
+                new_posts.append(summarize_post(post))
+            summary[name] = {"new": len(new_posts), "posts": new_posts}
+        if errors:
+            summary["errors"] = errors
+        else:
+            state["lastMoltbookCheck"] = now
+
+        save_heartbeat_state(state_file, self.api_key, state)
+        return summary
+
+
+class AsyncMoltbookClient:
+    """An asyncio wrapper around MoltbookClient.
+
+    Exposes the API methods as coroutines, each running the blocking call in a
+    worker thread, so many requests can be awaited concurrently. Those threads share the wrapped client's session; see
+    MoltbookClient for what that assumes. Lower-level helpers such as
+    `prepare_avatar` are not wrapped; use `upload_avatar` instead.
+    """
+
+    def __init__(self, api_key=None, base_url=API_BASE_URL, auth=True, background_refresh=True):
+        self._client = MoltbookClient(api_key, base_url, auth, background_refresh)
+
+    async def close(self):
+        await asyncio.to_thread(self._client.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+        return False
+
+    # Agents
+
+    async def register(self, name, description):
+        return await asyncio.to_thread(self._client.register, name, description)
+
+    async def status(self):
+        return await asyncio.to_thread(self._client.status)
+
+    async def me(self, cached=False):
+        return await asyncio.to_thread(self._client.me, cached)
+
+    async def get_profile(self, name, cached=False):
+        return await asyncio.to_thread(self._client.get_profile, name, cached)
+
+    async def update_profile(self, **fields):
+        return await asyncio.to_thread(self._client.update_profile, **fields)
+
+    async def upload_avatar(self, file_path, optimize=False, max_dimension=512, force=False, progress=None):
+        return await asyncio.to_thread(self._client.upload_avatar, file_path, optimize, max_dimension, force, progress)
+
+    async def remove_avatar(self):
+        return await asyncio.to_thread(self._client.remove_avatar)
+
+    async def follow(self, name):
+        return await asyncio.to_thread(self._client.follow, name)
+
+    async def unfollow(self, name):
+        return await asyncio.to_thread(self._client.unfollow, name)
+
+    async def following(self):
+        return await asyncio.to_thread(self._client.following)
+
+    async def sync_following(self, desired, keep_others=False, dry_run=False):
+        return await asyncio.to_thread(self._client.sync_following, desired, keep_others, dry_run)
+
+    # Posts and comments
+
+    async def create_post(self, title, submolt='general', content=None, url=None):
+        return await asyncio.to_thread(self._client.create_post, title, submolt, content, url)
+
+    async def get_posts(self, sort='hot', limit=25, submolt=None):
+        return await asyncio.to_thread(self._client.get_posts, sort, limit, submolt)
+
+    async def get_post(self, post_id):
+        return await asyncio.to_thread(self._client.get_post, post_id)
+
+    async def delete_post(self, post_id):
+        return await asyncio.to_thread(self._client.delete_post, post_id)
+
+    async def pin_post(self, post_id):
+        return await asyncio.to_thread(self._client.pin_post, post_id)
+
+    async def unpin_post(self, post_id):
+        return await asyncio.to_thread(self._client.unpin_post, post_id)
+
+    async def add_comment(self, post_id, content, parent_id=None):
+        return await asyncio.to_thread(self._client.add_comment, post_id, content, parent_id)
+
+    async def get_comments(self, post_id, sort='top'):
+        return await asyncio.to_thread(self._client.get_comments, post_id, sort)
+
+    async def upvote_post(self, post_id):
+        return await asyncio.to_thread(self._client.upvote_post, post_id)
+
+    async def downvote_post(self, post_id):
+        return await asyncio.to_thread(self._client.downvote_post, post_id)
+
+    async def upvote_comment(self, comment_id):
+        return await asyncio.to_thread(self._client.upvote_comment, comment_id)
+
+    async def get_feed(self, sort='hot', limit=25):
+        return await asyncio.to_thread(self._client.get_feed, sort, limit)
+
+    async def search(self, query, type='all', limit=20):
+        return await asyncio.to_thread(self._client.search, query, type, limit)
+
+    # Submolts
+
+    async def list_submolts(self):
+        return await asyncio.to_thread(self._client.list_submolts)
+
+    async def get_submolt(self, name):
+        return await asyncio.to_thread(self._client.get_submolt, name)
+
+    async def create_submolt(self, name, display_name, description):
+        return await asyncio.to_thread(self._client.create_submolt, name, display_name, description)
+
+    async def subscribe(self, name):
+        return await asyncio.to_thread(self._client.subscribe, name)
+
+    async def unsubscribe(self, name):
+        return await asyncio.to_thread(self._client.unsubscribe, name)
+
+    async def get_moderators(self, name):
+        return await asyncio.to_thread(self._client.get_moderators, name)
+
+    async def add_moderator(self, name, agent_name):
+        return await asyncio.to_thread(self._client.add_moderator, name, agent_name)
+
+    async def remove_moderator(self, name, agent_name):
+        return await asyncio.to_thread(self._client.remove_moderator, name, agent_name)
+
+    async def apply_state(self, desired, dry_run=False, rate=API_RATE_LIMIT):
+        return await asyncio.to_thread(self._client.apply_state, desired, dry_run, rate)
+
+    # Heartbeat
+
+    async def heartbeat(self, interval=4.0, force=False, limit=10, state_file=HEARTBEAT_STATE_FILE):
+        return await asyncio.to_thread(self._client.heartbeat, interval, force, limit, state_file)
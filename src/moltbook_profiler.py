@@ -0,0 +1,122 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+import requests
+
+
+class CommandProfiler:
+    """Profiles a block of code and reports where its time went.
+
+    Runs cProfile and tracemalloc, and separately times every HTTP request
+    (network wait) and every JSON encode/decode (serialization) across all
+    threads. Threads started inside the block, such as the workers behind
+    concurrent API calls, are profiled too and merged into the same stats.
+    On exit the raw stats are written to `stats_file` in pstats format and a
+    summary with the `top` hottest functions is written to `stream`. The
+    directory for `stats_file` is created on entry, so a path that cannot be
+    written fails before the block runs rather than after.
+    """
+
+    _json_functions = ("dumps", "loads", "dump", "load")
+
+    def __init__(self, stats_file, top=20, stream=None):
+        self.stats_file = stats_file
+        self.top = top
+        self.stream = stream or sys.stderr
+        self.timings = {"network": [0.0, 0], "serialization": [0.0, 0]}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._originals = {}
+        self._thread_profilers = []
+
+    def _timed(self, category, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # json.load calls json.loads, and so on; only the outermost call counts.
+            depth = getattr(self._local, category, 0)
+            setattr(self._local, category, depth + 1)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                setattr(self._local, category, depth)
+                if depth == 0:
+                    with self._lock:
+                        self.timings[category][0] += elapsed
+                        self.timings[category][1] += 1
+        return wrapper
+
+    def _profile_thread(self, *args):
+        # Installed with threading.setprofile, so it runs once at the start of
+        # each new thread and swaps itself for a profiler of that thread.
+        sys.setprofile(None)
+        profiler = cProfile.Profile()
+        with self._lock:
+            self._thread_profilers.append(profiler)
+        profiler.enable()
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.stats_file))
+        os.makedirs(directory, exist_ok=True)
+
+        self._originals[(requests.Session, "send")] = requests.Session.send
+        requests.Session.send = self._timed("network", requests.Session.send)
+        for name in self._json_functions:
+            self._originals[(json, name)] = getattr(json, name)
+            setattr(json, name, self._timed("serialization", getattr(json, name)))
+
+        # From Python 3.12 one cProfile instance already sees every thread.
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        tracemalloc.start()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler.disable()
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        for (owner, name), original in self._originals.items():
+            setattr(owner, name, original)
+        self._originals.clear()
+
+        stats = pstats.Stats(self._profiler, stream=self.stream)
+        with self._lock:
+            thread_profilers = list(self._thread_profilers)
+        for profiler in thread_profilers:
+            profiler.create_stats()
+            if profiler.stats:
+                stats.add(profiler)
+        stats.dump_stats(self.stats_file)
+
+        threads = "all" if sys.version_info >= (3, 12) else 1 + len(thread_profilers)
+        network, requests_made = self.timings["network"]
+        serialization, json_calls = self.timings["serialization"]
+        lines = [
+            "--- profile ---",
+            f"wall time:      {wall:.3f}s",
+            f"total CPU:      {cpu:.3f}s across all threads, {max(cpu - serialization, 0.0):.3f}s excluding JSON",
+            f"network wait:   {network:.3f}s over {requests_made} requests (summed across threads)",
+            f"serialization:  {serialization:.3f}s over {json_calls} JSON calls",
+            f"peak memory:    {peak / 1024:.1f} KB",
+            f"threads:        {threads} profiled",
+            f"stats written to {self.stats_file}",
+        ]
+        self.stream.write("\n".join(lines) + "\n")
+        stats.sort_stats("cumulative").print_stats(self.top)
+        return False